@@ -1,8 +1,22 @@
+import bisect
 import math
+import numpy as np
 import streamlit as st
-import matplotlib.pyplot as plt
-from matplotlib.patches import Rectangle
+import plotly.graph_objects as go
 
+# tan(0.1°): the side cut-off expressed as h / r.
+_TAN_MIN_ANGLE = math.tan(math.radians(0.1))
+
+# Rectangle corners of a tower icon: x offsets from phi (fixed width of 2°)
+# and y factors of the tower height.
+_TOWER_OX = np.array([-1.0, 1.0, 1.0, -1.0])
+_TOWER_OY = np.array([0.0, 0.0, 1.0, 1.0])
+
+# Upper bounds (inclusive) of each classification band but the last.
+_THRESH = (7, 14, 25, 36)
+_LABELS = ("Very low", "Low", "Moderate", "High", "Very high")
+
+@st.cache_data(show_spinner=False)
 def classify_magnitude(value):
     """
     Classify the summed value:
@@ -12,134 +26,135 @@ def classify_magnitude(value):
       26–36 => High
       37+   => Very high
     """
-    if value <= 7:
-        return "Very low"
-    elif value <= 14:
-        return "Low"
-    elif value <= 25:
-        return "Moderate"
-    elif value <= 36:
-        return "High"
-    else:
-        return "Very high"
+    return _LABELS[bisect.bisect_left(_THRESH, value)]
 
-def compute_sums(tower_height_m, span_between_towers_m, tower_angle_deg):
+# Bounded so that each distinct input combination does not stay cached for
+# the life of the server.
+@st.cache_data(show_spinner=False, max_entries=128)
+def compute_sums(tower_height_m, span_between_towers_m, d):
     """
     For each x in the range -4000 to 4000 (step=span_between_towers_m),
     compute the apparent angle using:
        raw_angle = degrees(atan(tower_height_m / sqrt(d^2 + x^2))),
-    where d = tower_height_m / tan(tower_angle_deg).
+    where d = tower_height_m / tan(tower_angle_deg) is precomputed by the
+    caller, which also rejects angles whose tangent is zero.
 
     Towers with raw_angle > 3° are included in the main sum.
     Towers with raw_angle between 0.1° and 3° are included in the side sum.
+
+    Also returns, for every tower at or above 0.1°, the (N, 4, 2) rectangle
+    vertices for visualize_towers and a boolean is_main array.
     """
-    angle_radians = math.radians(tower_angle_deg)
-    if abs(math.tan(angle_radians)) < 1e-12:
-        return (0, 0, 0.0), (0, 0, 0.0)
-    
-    d = tower_height_m / math.tan(angle_radians)
-    
-    floor_3p = 0
-    ceil_3p  = 0
-    dec_3p   = 0.0
-
-    floor_sub3 = 0
-    ceil_sub3  = 0
-    dec_sub3   = 0.0
-
-    for x in range(-4000, 4001, int(span_between_towers_m)):
-        r = math.hypot(d, x)
-        if r <= 0:
-            continue
-        raw_angle = math.degrees(math.atan(tower_height_m / r))
-        if raw_angle < 0.1:
-            continue
-
-        if raw_angle > 3.0:
-            floor_3p += math.floor(raw_angle)
-            ceil_3p  += math.ceil(raw_angle)
-            dec_3p   += raw_angle
-        else:
-            floor_sub3 += math.floor(raw_angle)
-            ceil_sub3  += math.ceil(raw_angle)
-            dec_sub3   += raw_angle
-
-    return (floor_3p, ceil_3p, dec_3p), (floor_sub3, ceil_sub3, dec_sub3)
-
-def visualize_towers(tower_height_m, span_between_towers_m, tower_angle_deg,
-                     f3, c3, d3, classification, triggers_intermediate):
+    step = int(span_between_towers_m)
+    # r and raw_angle depend only on |x| and phi mirrors around 95°, so on a
+    # grid symmetric about x = 0 only the x >= 0 half is evaluated.
+    symmetric = step > 0 and 8000 % step == 0
+
+    # raw_angle falls monotonically with |x|, so the 0.1° cut-off is an |x|
+    # bound: only grid points with r <= h / tan(0.1°) are generated. The bound
+    # is widened slightly so rounding never drops a tower; the exact per-tower
+    # tests below decide the boundary cases.
+    reach_sq = (tower_height_m / _TAN_MIN_ANGLE * (1 + 1e-9)) ** 2 - d ** 2
+    if tower_height_m > 0 and step > 0 and reach_sq >= 0:
+        x_max = min(math.sqrt(reach_sq), 4000.0)
+        x_min = 0.0 if symmetric else -x_max
+        k = np.arange(math.ceil((x_min + 4000) / step),
+                      math.floor((x_max + 4000) / step) + 1)
+        x = -4000.0 + step * k
+    else:
+        x = np.empty(0)
+
+    r = np.hypot(d, x)
+    keep = r > 0
+    x, r = x[keep], r[keep]
+    raw_angle = np.degrees(np.arctan(tower_height_m / r))
+    keep = raw_angle >= 0.1
+    x, raw_angle = x[keep], raw_angle[keep]
+    is_main = raw_angle > 3.0
+
+    # Compute horizontal angle phi. atan is odd, so the signed x / d puts
+    # towers either side of 95° and the central tower lands exactly on it.
+    phi_calc = np.degrees(np.arctan(x / d))
+    phi = 95 + phi_calc
+
+    if symmetric:
+        # Add the negative twin of every x > 0 tower.
+        twin = x > 0
+        raw_angle = np.concatenate((raw_angle[twin], raw_angle))
+        is_main = np.concatenate((is_main[twin], is_main))
+        phi = np.concatenate((95 - phi_calc[twin], phi))
+    np.clip(phi, 0, 180, out=phi)
+
+    main = raw_angle[is_main]
+    side = raw_angle[~is_main]
+
+    floor_3p = int(np.floor(main).sum())
+    ceil_3p  = int(np.ceil(main).sum())
+    dec_3p   = float(main.sum())
+
+    floor_sub3 = int(np.floor(side).sum())
+    ceil_sub3  = int(np.ceil(side).sum())
+    dec_sub3   = float(side.sum())
+
+    # Use the full raw_angle (capped at 40°) as the tower's height.
+    top_deg = np.minimum(raw_angle, 40.0)
+    # Chart coordinates need no more than float32, so build the buffer that way.
+    verts = np.empty((phi.size, 4, 2), dtype=np.float32)
+    verts[..., 0] = phi[:, None] + _TOWER_OX[None, :]
+    verts[..., 1] = top_deg[:, None] * _TOWER_OY[None, :]
+
+    return (floor_3p, ceil_3p, dec_3p), (floor_sub3, ceil_sub3, dec_sub3), verts, is_main
+
+def _polygon_path(verts):
     """
-    Creates an alignment chart using a simple rectangle for each tower.
-    Each tower is drawn as a rectangle (fixed width) whose height equals
-    the computed raw_angle (capped at 40°). The horizontal position is
-    determined by the computed phi value.
+    Flattens (N, 4, 2) tower rectangles into one outline, closing every
+    rectangle and separating them with NaN gaps, so a single filled
+    Scatter trace draws all of them.
     """
-    angle_radians = math.radians(tower_angle_deg)
-    if abs(math.tan(angle_radians)) < 1e-12:
-        st.write("Angle too small.")
-        return None
-
-    d = tower_height_m / math.tan(angle_radians)
-    towers_data = []
-    for x in range(-4000, 4001, int(span_between_towers_m)):
-        r = math.hypot(d, x)
-        if r <= 0:
-            continue
-        raw_angle = math.degrees(math.atan(tower_height_m / r))
-        if raw_angle < 0.1:
-            continue
-        
-        # Compute horizontal angle phi.
-        if x == 0:
-            phi = 95.0  # Central tower is fixed at 95°.
-        else:
-            phi_calc = math.degrees(math.atan(abs(x) / d))
-            phi = 95 + phi_calc if x > 0 else 95 - phi_calc
-            phi = max(0, min(180, phi))
-        
-        color = 'red' if raw_angle > 3.0 else 'blue'
-        # Use the full raw_angle (capped at 40°) as the tower's height.
-        top_deg = min(raw_angle, 40.0)
-        towers_data.append((phi, top_deg, color))
-
-    # Create a high-resolution figure.
-    fig, ax = plt.subplots(figsize=(12, 3), dpi=300)
-    
-    # Draw vertical grid lines at every 10° on the horizontal axis.
-    for xv in range(0, 181, 10):
-        ax.axvline(x=xv, color='gray', lw=0.5, alpha=0.5)
-    # Draw horizontal grid lines for every degree on the vertical axis.
-    for yv in range(0, 41):
-        ax.axhline(y=yv, color='gray', lw=0.5, alpha=0.5)
-
-    ax.set_xticks(range(0, 181, 10))
-    ax.set_yticks(range(0, 41, 5))
-    
-    ax.set_xlim(0, 180)
-    ax.set_ylim(0, 40)
-    ax.set_xlabel("Horizontal angle (°)")
-    ax.set_ylabel("Vertical angle (°)")
-    ax.set_title("Transmission Simple Assessment Tool")
-    
-    # Ensure the plot is drawn to scale.
-    ax.set_aspect('equal', adjustable='box')
+    ring = np.full((verts.shape[0], 6, 2), np.nan, dtype=verts.dtype)
+    ring[:, :4] = verts
+    ring[:, 4] = verts[:, 0]
+    return ring[..., 0].ravel(), ring[..., 1].ravel()
 
-    # Draw each tower as a simple rectangle.
-    for (phi, top_deg, color) in towers_data:
-        width = 2.0  # Fixed width for each tower icon.
-        lower_left = (phi - width/2, 0)
-        rect = Rectangle(lower_left, width, top_deg, facecolor=color, edgecolor=color, alpha=0.6)
-        ax.add_patch(rect)
+def visualize_towers(f3, c3, d3, classification, triggers_intermediate,
+                     verts, is_main):
+    """
+    Creates an alignment chart using a simple rectangle for each tower.
+    Towers are batched into one filled Plotly trace per category; each
+    rectangle has a fixed width and a height equal to the computed
+    raw_angle (capped at 40°). The horizontal position is determined by
+    the computed phi value.
+
+    verts and is_main are the tower rectangles and categories returned by
+    compute_sums.
+    """
+    fig = go.Figure()
+    for towers, color in ((~is_main, 'blue'), (is_main, 'red')):
+        x, y = _polygon_path(verts[towers])
+        fig.add_trace(go.Scatter(x=x, y=y, mode='lines', fill='toself',
+                                 fillcolor=color, line=dict(color=color, width=1),
+                                 opacity=0.6, hoverinfo='skip', showlegend=False))
+
+    # Grid lines at every 10° horizontally and every degree vertically.
+    # Constraining the domain keeps both ranges while drawing to scale.
+    grid = dict(showgrid=True, gridcolor='lightgray', gridwidth=0.5)
+    fig.update_xaxes(title_text="Horizontal angle (°)", range=[0, 180],
+                     tick0=0, dtick=10, constrain='domain',
+                     showline=True, linecolor='black', mirror=True, **grid)
+    fig.update_yaxes(title_text="Vertical angle (°)", range=[0, 40],
+                     tick0=0, dtick=5, minor=dict(dtick=1, **grid),
+                     scaleanchor='x', scaleratio=1, constrain='domain',
+                     showline=True, linecolor='black', mirror=True, **grid)
 
     main_text = (f"Towers >3° => Lower Sum: {f3} | Upper Sum: {c3} | Decimal Sum: {d3:.2f} | "
                  f"Classification: {classification} | "
                  f"Intermediate: {'YES' if triggers_intermediate else 'NO'}")
-    
-    # Adjust bottom margin and position summary text well below the x-axis.
-    fig.subplots_adjust(bottom=0.7)
-    fig.text(0.5, 0.0, main_text, ha='center', va='bottom', fontsize=10)
-    
-    plt.tight_layout()
+    # Position summary text well below the x-axis.
+    fig.add_annotation(text=main_text, xref='paper', yref='paper', x=0.5, y=0,
+                       yanchor='top', yshift=-50, showarrow=False, font=dict(size=12))
+    fig.update_layout(title=dict(text="Transmission Simple Assessment Tool", x=0.5),
+                      plot_bgcolor='white', height=350,
+                      margin=dict(l=60, r=20, t=50, b=100))
     return fig
 
 # --- Streamlit App Interface ---
@@ -151,7 +166,13 @@ span = st.number_input("Span Between Towers (m):", value=100.0, step=1.0)
 tower_angle = st.number_input("Tower Height Angle (°):", min_value=1.0, max_value=20.0, value=5.0, step=0.1)
 
 if st.button("Calculate"):
-    (f3, c3, d3), (f_sub3, c_sub3, dec_sub3) = compute_sums(tower_height, span, tower_angle)
+    tan_a = math.tan(math.radians(tower_angle))
+    if abs(tan_a) < 1e-12:
+        st.error("Angle too small.")
+        st.stop()
+    d = tower_height / tan_a
+
+    (f3, c3, d3), (f_sub3, c_sub3, dec_sub3), verts, is_main = compute_sums(tower_height, span, d)
     # Classification is based on the upper sum (c3) for towers with raw_angle > 3°.
     classification = classify_magnitude(c3)
     triggers_intermediate = (c3 >= 16)
@@ -171,6 +192,5 @@ if st.button("Calculate"):
     st.write(f"Lower Sum: {f_sub3}, Upper Sum: {c_sub3}, Decimal Sum: {dec_sub3:.2f}")
     
     # Display the alignment chart.
-    fig = visualize_towers(tower_height, span, tower_angle, f3, c3, d3, classification, triggers_intermediate)
-    if fig is not None:
-        st.pyplot(fig)
+    fig = visualize_towers(f3, c3, d3, classification, triggers_intermediate, verts, is_main)
+    st.plotly_chart(fig)